@@ -1,17 +1,21 @@
 import os.path
-
-import yaml
-import lakefs_client
-from lakefs_client.client import LakeFSClient
-from email_validator import validate_email, EmailNotValidError
-
+import re
+import sys
+import threading
+import typing
 
 from .config import PlaygroundDetails
-from .fs import register_fs
+
+if typing.TYPE_CHECKING:
+    from lakefs_client.client import LakeFSClient
 
 
 LAKECTL_CONFIG_LOCATION = '~/.lakectl.yaml'
 PLAYGROUND_CONTROL_PLANE_URL = "https://demo.lakefs.io/api/v1/notebook"
+PLAYGROUND_CONTROL_PLANE_TIMEOUT = 60  # seconds, creating a new environment can take a while
+
+# Syntactic check only: a local part and a dotted domain, separated by a single '@'
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
 
 WELCOME_BANNER = """
      ██╗      █████╗ ██╗  ██╗███████╗███████╗███████╗
@@ -37,21 +41,68 @@ WELCOME_BANNER = """
 """
 
 
+def _split_banner(template: str) -> typing.Tuple[bytes, ...]:
+    """
+    Split the banner template around its {host}, {key} and {secret} fields, UTF-8 encoding each part
+    """
+    head, rest = template.split("{host}")
+    after_host, rest = rest.split("{key}")
+    after_key, tail = rest.split("{secret}")
+    return tuple(part.encode("utf-8") for part in (head, after_host, after_key, tail + "\n"))
+
+
+_BANNER_PARTS = _split_banner(WELCOME_BANNER)
+
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
 class LakeFSPlaygroundError(RuntimeError):
     pass
 
 
+def _session():
+    """
+    Return a process-wide requests.Session, so that calls to the control plane reuse pooled connections
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+                _SESSION = requests.Session()
+    return _SESSION
+
+
+def _print_banner(details: PlaygroundDetails):
+    """
+    Write WELCOME_BANNER filled in with details to stdout
+    """
+    head, after_host, after_key, tail = _BANNER_PARTS
+    banner = b"".join((
+        head, details.endpoint_url.encode("utf-8"),
+        after_host, details.access_key_id.encode("utf-8"),
+        after_key, details.secret_access_key.encode("utf-8"),
+        tail,
+    ))
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # e.g. notebook kernels, where stdout is a text-only stream
+        sys.stdout.write(banner.decode("utf-8"))
+        return
+    sys.stdout.flush()
+    buffer.write(banner)
+    buffer.flush()
+
+
 def check_email(email_addr: str) -> bool:
     """
     Make sure that the given email address is valid
     :param email_addr: email address
     :return: True if a valid email address was given, False otherwise
     """
-    try:
-        validate_email(email_addr)
-    except EmailNotValidError:
-        return False
-    return True
+    return _EMAIL_RE.fullmatch(email_addr) is not None
 
 
 def get_or_create(email: str, silent: bool = False) -> PlaygroundDetails:
@@ -62,17 +113,23 @@ def get_or_create(email: str, silent: bool = False) -> PlaygroundDetails:
     :param silent: if False, will print a friendly banner
     :return: a PlaygroundDetails object that contains information about the environment
     """
-    import requests
-    import base64
-    import json
+    try:
+        import pybase64 as base64
+    except ImportError:
+        import base64
+    try:
+        import orjson as json
+    except ImportError:
+        import json
 
-    resp = requests.post(PLAYGROUND_CONTROL_PLANE_URL, params={"email": email})
+    resp = _session().post(
+        PLAYGROUND_CONTROL_PLANE_URL, params={"email": email}, timeout=PLAYGROUND_CONTROL_PLANE_TIMEOUT)
     if resp.status_code != 200:
         raise LakeFSPlaygroundError(f"HTTP {resp.status_code}: {resp.text}")
 
     # Decode Message
-    message_bytes = base64.b64decode(resp.content)
-    message = json.loads(message_bytes.decode("ascii"))
+    message_bytes = base64.b64decode(resp.content, validate=False)
+    message = json.loads(message_bytes)
 
     details = PlaygroundDetails(
         access_key_id=message["LakeFSCreds"]["AccessKeyID"],
@@ -80,18 +137,20 @@ def get_or_create(email: str, silent: bool = False) -> PlaygroundDetails:
         endpoint_url=message["Host"],
     )
     if not silent:
-        print(WELCOME_BANNER.format(
-            host=details.endpoint_url, key=details.access_key_id, secret=details.secret_access_key))
+        _print_banner(details)
     return details
 
 
-def client(details: PlaygroundDetails) -> LakeFSClient:
+def client(details: PlaygroundDetails) -> 'LakeFSClient':
     """
     Get an API client configured from the details provided
     :param details: PlaygroundDetails object with information about the lakeFS installation
         (as returned from get_or_create)
     :return: a lakefs_client.ApiClient configured to use the provided details
     """
+    import lakefs_client
+    from lakefs_client.client import LakeFSClient
+
     conf = lakefs_client.Configuration(
         host=f"https://{details.endpoint_url}/api/v1",
         username=details.access_key_id,
@@ -107,8 +166,14 @@ def configure_cli(details: PlaygroundDetails, destination=LAKECTL_CONFIG_LOCATIO
         (as returned from get_or_create)
     :param destination: location to write the configuration file to
     """
+    import yaml
+    try:
+        from yaml import CSafeDumper as SafeDumper
+    except ImportError:
+        from yaml import SafeDumper
+
     with open(os.path.expanduser(destination), 'w') as config_handle:
-        yaml.safe_dump({
+        yaml.dump({
             'server': {
                 'endpoint_url': f'https://{details.endpoint_url}/api/v1',
             },
@@ -116,7 +181,18 @@ def configure_cli(details: PlaygroundDetails, destination=LAKECTL_CONFIG_LOCATIO
                 'access_key_id': details.access_key_id,
                 'secret_access_key': details.secret_access_key,
             },
-        }, config_handle)
+        }, config_handle, Dumper=SafeDumper)
+
+
+def register_fs(details: PlaygroundDetails):
+    """
+    Register a `lakefs://` URI handler with fsspec, without writing a lakectl configuration
+    :param details: PlaygroundDetails object with information about the lakeFS installation
+        (as returned from get_or_create)
+    """
+    from . import fs
+
+    fs.register_fs(details=details)
 
 
 def mount(details: PlaygroundDetails):
@@ -1,5 +1,8 @@
+import concurrent.futures
 import datetime
+import itertools
 import os
+import re
 import tempfile
 from typing import List, Tuple, Union
 
@@ -8,37 +11,55 @@ from fsspec.spec import AbstractFileSystem, AbstractBufferedFile
 
 import lakefs_client
 from lakefs_client.client import LakeFSClient
+from lakefs_client.model.path_list import PathList
+
+
+LIST_OBJECTS_PAGE_SIZE = 1000  # maximum page size accepted by the lakeFS API
+DELETE_OBJECTS_BATCH_SIZE = 1000  # maximum number of paths accepted by a single delete_objects call
+MAX_CONCURRENT_REQUESTS = 16
+
+# lakeFS commit IDs are hex-encoded SHA-256 digests; the content they point to never changes
+_COMMIT_ID_RE = re.compile(r"[0-9a-f]{64}")
+# glob characters understood by fsspec's expand_path
+_GLOB_MAGIC_RE = re.compile(r"[*?[]")
+
+# bound once, used for every listed object in _object_stat_to_entry
+_UTC = datetime.timezone.utc
+_fromtimestamp = datetime.datetime.fromtimestamp
 
 
 def _split_path(path: str) -> Tuple[str, str, str]:
-    repo, _, rest = path.partition("/")
-    ref, _, rest = rest.partition("/")
-    return repo, ref, rest
+    parts = path.split("/", 2)
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+    if len(parts) == 2:
+        return parts[0], parts[1], ""
+    return path, "", ""
 
 
-def _remove_suffix(path: str, suffix: str) -> str:
-    return path if not path.endswith(suffix) else path[:len(path) - len(suffix)]
+def _is_commit_id(ref: str) -> bool:
+    return _COMMIT_ID_RE.fullmatch(ref) is not None
 
 
 def _object_stat_to_entry(repo, ref, stat):
-    path = stat.get("path")
-    key = f"{repo}/{ref}/{path}"
-    if stat.get("path_type") == "object":
+    key = f"{repo}/{ref}/{stat.path}"
+    if stat.path_type == "object":
+        # size_bytes is optional in the ObjectStats model, the other fields are required
+        size = stat.get("size_bytes")
         return {
-            "ETag": stat.get("checksum"),
+            "ETag": stat.checksum,
             "Key": key,
             "name": key,
             "type": "file",
-            "size": stat.get("size_bytes"),
-            "Size": stat.get("size_bytes"),
+            "size": size,
+            "Size": size,
             "StorageClass": "STANDARD",
-            "LastModified": datetime.datetime.fromtimestamp(
-                stat.get("mtime"), datetime.timezone.utc
-            ),
+            "LastModified": _fromtimestamp(stat.mtime, _UTC),
         }
+    key = key.removesuffix("/")
     return {
-        "Key": _remove_suffix(key, "/"),
-        "name": _remove_suffix(key, "/"),
+        "Key": key,
+        "name": key,
         "size": 0,
         "Size": 0,
         "StorageClass": "DIRECTORY",
@@ -46,6 +67,18 @@ def _object_stat_to_entry(repo, ref, stat):
     }
 
 
+def _has_magic(path: str) -> bool:
+    return _GLOB_MAGIC_RE.search(path) is not None
+
+
+def _entry_names(entries):
+    # directories are listed with their trailing '/', as returned by list_objects
+    return [
+        e["name"].removesuffix("/") if e["type"] == "file" else e["name"] + "/"
+        for e in entries
+    ]
+
+
 class LakeFSNativeFS(AbstractFileSystem):
     def __init__(self, key, secret, host, *args, **kwargs):
         self.key = key
@@ -56,39 +89,51 @@ class LakeFSNativeFS(AbstractFileSystem):
         self._client_configuration = lakefs_client.Configuration(
             host=f"https://{host}/api/v1", username=key, password=secret
         )
+        # allow concurrent requests (e.g. bulk deletes) to each use their own pooled connection
+        self._client_configuration.connection_pool_maxsize = max(
+            self._client_configuration.connection_pool_maxsize, MAX_CONCURRENT_REQUESTS
+        )
         self._client = LakeFSClient(self._client_configuration)
 
-    def ls(self, path, detail=True, **kwargs):
+    def ls(self, path, detail=True, refresh=False, **kwargs):
         repo, ref, key = _split_path(path)
+        if not refresh and _is_commit_id(ref):
+            # listings of a commit are immutable, so a cached listing never goes stale
+            entries = self.dircache.get(path.rstrip("/"))
+            if entries is not None:
+                return entries if detail else _entry_names(entries)
         return self._ls(repo, ref, key, detail, **kwargs)
 
-    def _ls(self, repo, ref, key, detail=True, **kwargs):
-        records = []
-        after = None
+    def _iter_list_objects(self, repo, ref, **kwargs):
+        """
+        Yield ObjectStats records from list_objects, fetching one page at a time
+        """
+        kwargs["amount"] = LIST_OBJECTS_PAGE_SIZE
         while True:
-            kwargs = {"prefix": key, "delimiter": "/"}
-            if after is not None:
-                kwargs["after"] = after
             current = self._client.objects.list_objects(repo, ref, **kwargs)
-            records += current.get("results")
-            if not current.get("pagination").get("has_more"):
-                break  # Done
-            after = current.get("pagination").get("next_offset")
+            yield from current["results"]
+            pagination = current["pagination"]
+            if not pagination["has_more"]:
+                return  # Done
+            kwargs["after"] = pagination["next_offset"]
+
+    def _ls(self, repo, ref, key, detail=True, **kwargs):
+        records = list(self._iter_list_objects(repo, ref, prefix=key, delimiter="/"))
 
         # handle directories when not passing a trailing '/':
         if len(records) == 1:
             r = records[0]
-            if r.get('path').endswith('/') and r.get('path_type') != 'object':
-                return self._ls(repo, ref, key + '/')
+            if r.path.endswith('/') and r.path_type != 'object':
+                return self._ls(repo, ref, key + '/', detail)
+
+        entries = [_object_stat_to_entry(repo, ref, f) for f in records]
+        if not key or key.endswith('/'):
+            # only listings of a whole directory are cached; bare prefixes may match sibling names
+            self.dircache[f'{repo}/{ref}/{key}'.rstrip('/')] = entries
 
         if detail:
-            return [_object_stat_to_entry(repo, ref, f) for f in records]
-        return [
-            _remove_suffix(f'{repo}/{ref}/{d["path"]}', "/")
-            if d.get("path_type") == "object"
-            else f'{repo}/{ref}/{d["path"]}'
-            for d in records
-        ]
+            return entries
+        return _entry_names(entries)
 
     def _open(
         self,
@@ -117,7 +162,7 @@ class LakeFSNativeFS(AbstractFileSystem):
             return
         repo, ref, key = _split_path(path)
         self._client.objects.delete_object(repo, ref, key)
-        self.invalidate_cache(self._parent(path))
+        self._invalidate_removed(path)
 
     def rm(self, path: Union[str, List[str]], recursive=False, maxdepth=None):
         if isinstance(path, list):
@@ -126,17 +171,56 @@ class LakeFSNativeFS(AbstractFileSystem):
             return
 
         repo, ref, _ = _split_path(path)
-        path_expand = self.expand_path(path, recursive=recursive, maxdepth=maxdepth)
-        path_expand = [_split_path(file)[2] for file in path_expand]
-
-        def chunks(lst: list, num: int):
-            for i in range(0, len(lst), num):
-                yield lst[i:i + num]
-
-        for files in chunks(path_expand, 1000):
-            self._client.objects.delete_objects(repo, ref, files)
-
-        self.invalidate_cache(self._parent(path))
+        keys = self._iter_expand(path, recursive=recursive, maxdepth=maxdepth)
+        batches = iter(lambda: list(itertools.islice(keys, DELETE_OBJECTS_BATCH_SIZE)), [])
+
+        # keep at most MAX_CONCURRENT_REQUESTS batches in flight, so listing never runs far ahead of deleting,
+        # and check finished batches before each submit, so the first failure stops the removal
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            pending = set()
+            try:
+                for files in batches:
+                    done, pending = concurrent.futures.wait(
+                        pending,
+                        timeout=0 if len(pending) < MAX_CONCURRENT_REQUESTS else None,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        future.result()
+                    pending.add(executor.submit(
+                        self._client.objects.delete_objects, repo, ref, PathList(paths=files)))
+                for future in concurrent.futures.as_completed(pending):
+                    future.result()
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        if _has_magic(path):
+            # a glob may have matched directories anywhere below its first wildcard component
+            path = path[:_GLOB_MAGIC_RE.search(path).start()].rpartition("/")[0]
+        self._invalidate_removed(path)
+
+    def _iter_expand(self, path, recursive=False, maxdepth=None):
+        """
+        Yield the keys (relative to their ref) that rm should delete for path.
+        A recursive, unbounded expansion of a path without wildcards streams them from list_objects
+        page by page instead of materializing the whole tree.
+        """
+        if not recursive or maxdepth is not None or _has_magic(path):
+            for file in self.expand_path(path, recursive=recursive, maxdepth=maxdepth):
+                yield _split_path(file)[2]
+            return
+        repo, ref, key = _split_path(self._strip_protocol(path))
+        key = key.rstrip("/")
+        found = False
+        for record in self._iter_list_objects(repo, ref, prefix=f"{key}/" if key else ""):
+            found = True
+            yield record.path
+        if key and (found or self.exists(path)):
+            yield key
+        elif not found:
+            raise FileNotFoundError(path)
 
     def get_path(self, rpath, lpath, **kwargs):
         """
@@ -158,11 +242,17 @@ class LakeFSNativeFS(AbstractFileSystem):
         if os.path.isdir(lpath):
             self.makedirs(rpath, exist_ok=True)
         else:
-            repo, ref, key = _split_path(rpath)
             with open(lpath, "rb") as out_file:
-                self._client.objects.upload_object(repo, ref, key, content=out_file)
+                self._upload_fileobj(out_file, rpath)
         self.invalidate_cache(self._parent(rpath))
 
+    def _upload_fileobj(self, fileobj, rpath):
+        """
+        Upload the contents of an open binary file object, from its current position, to rpath
+        """
+        repo, ref, key = _split_path(rpath)
+        self._client.objects.upload_object(repo, ref, key, content=fileobj)
+
     def created(self, path):
         """Return the created timestamp of a file as a datetime.datetime"""
         repo, ref, key = _split_path(path)
@@ -181,26 +271,42 @@ class LakeFSNativeFS(AbstractFileSystem):
         """
         Return object bytes in range
         """
+        if end is not None and end <= (start or 0):
+            return b""
         repo, ref, key = _split_path(path)
+        kwargs = {}
+        if start is not None or end is not None:
+            # HTTP ranges are inclusive, while `end` is exclusive
+            kwargs["range"] = f"bytes={start or 0}-{end - 1 if end is not None else ''}"
         try:
-            stream = self._client.objects.get_object(repo, ref, key)
-            data = stream.read()
+            stream = self._client.objects.get_object(repo, ref, key, **kwargs)
+            return stream.read()
         except Exception as e:
             raise ValueError(f'Error reading path: {path}: {e}')
-        # TODO(remove this once a release that includes
-        #  https://github.com/treeverse/lakeFS/pull/4623 is available on Pypi)
-        if start is not None and end is not None:
-            return data[start:end]
-        if start is not None:
-            return data[start:]
-        if end is not None and end <= len(data):
-            return data[:end]
-        return data
+
+    def _info_from_cache(self, path):
+        """
+        Return the entry for path from its parent's cached listing, or None if not cached
+        """
+        path = self._strip_protocol(path).rstrip("/")
+        for entry in self.dircache.get(self._parent(path), ()):
+            if entry["name"] == path:
+                return entry
+        return None
+
+    def info(self, path, **kwargs):
+        entry = self._info_from_cache(path)
+        if entry is not None:
+            return entry
+        return super().info(path, **kwargs)
 
     def isfile(self, path):
+        entry = self._info_from_cache(path)
+        if entry is not None:
+            return entry["type"] == "file"
         repo, ref, key = _split_path(path)
         stat = self._client.objects.stat_object(repo, ref, key)
-        return stat.get("path_type") == "object"
+        return stat.path_type == "object"
 
     def touch(self, path, truncate=True, **kwargs):
         if truncate or not self.exists(path):
@@ -219,11 +325,22 @@ class LakeFSNativeFS(AbstractFileSystem):
             self.dircache.clear()
         else:
             path = self._strip_protocol(path)
-            path = path.lstrip("/")
-            self.dircache.pop(path, None)
+            path = path.strip("/")
+            if _is_commit_id(_split_path(path)[1]):
+                return  # nothing under a commit can change
             while path:
                 self.dircache.pop(path, None)
-                path = self._parent(path)
+                path = path.rpartition("/")[0]
+
+    def _invalidate_removed(self, path):
+        """
+        Drop cached listings of a removed path, everything below it, and its ancestors
+        """
+        path = self._strip_protocol(path).strip("/")
+        prefix = path + "/"
+        for cached in [p for p in self.dircache if p == path or p.startswith(prefix)]:
+            self.dircache.pop(cached, None)
+        self.invalidate_cache(self._parent(path))
 
 
 class LakeFSBufferedFile(AbstractBufferedFile):
@@ -244,14 +361,18 @@ class LakeFSBufferedFile(AbstractBufferedFile):
             self._tempfile.write(data)
 
         if final:
-            self.fs.put_file(self._tempfile.name, self.path)
+            # upload straight from the open handle rather than reopening the file by name;
+            # pass the underlying file, the client requires an io.IOBase and not the tempfile wrapper
+            self._tempfile.seek(0)
+            self.fs._upload_fileobj(self._tempfile.file, self.path)
             self._tempfile.close()
+            self.fs.invalidate_cache(self.fs._parent(self.path))
 
         return True
 
     def _initiate_upload(self):
         """Create remote file/upload"""
-        self._tempfile = tempfile.NamedTemporaryFile("wb")
+        self._tempfile = tempfile.NamedTemporaryFile("w+b")
         self.loc = 0
 
     def _fetch_range(self, start, end):
@@ -17,11 +17,13 @@ setup(
     platforms=['any'],
     long_description=long_description,
     long_description_content_type='text/markdown',
+    python_requires='>=3.9',
     install_requires=[
         'fsspec>=2021.11.0',
         'requests>=2.0.0',
-        'lakefs-client>=0.85.0',
-        'email-validator==1.3.0',
+        'lakefs-client>=0.88.0',
         'PyYAML>=6.0',
+        'orjson>=3.0.0',
+        'pybase64>=1.0.0',
     ],
 )